@@ -2,6 +2,16 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import io
+import os
+import sys
+import gzip
+import pickle
+import sqlite3
+import tempfile
+import openpyxl
+from openpyxl.worksheet._reader import WorkSheetParser
+from openpyxl.xml.constants import SHEET_MAIN_NS
+from openpyxl.xml.functions import iterparse
 
 # Page config
 st.set_page_config(
@@ -74,8 +84,12 @@ st.markdown("""
 
 
 # Helper Functions
-def find_credit_classes(classes_df, students_df, search_term, missed_class_id, process_all):
-    """Main logic for finding credit classes - MATCHES DESKTOP VERSION"""
+def find_credit_classes(classes_df, students_df, search_term, missed_class_id, process_all, class_overlay=None):
+    """Main logic for finding credit classes - MATCHES DESKTOP VERSION
+
+    class_overlay (from apply_scenario_overlays) replaces the touched classes with
+    scenario rows; all other classes are read from classes_df as usual.
+    """
     results = []
     message_student_name = None
     message_subject = None
@@ -101,6 +115,24 @@ def find_credit_classes(classes_df, students_df, search_term, missed_class_id, p
     duration_col = next((col for col in classes_df.columns if 'duration' in col.lower()), None)
     classname_col = next((col for col in classes_df.columns if 'class' in col.lower() and 'name' in col.lower()), None)
     
+    # Scenario overlay: touched classes resolve through the overlay rows, everything else through classes_df
+    touched_ids = set()
+    if class_overlay is not None:
+        touched_ids = class_overlay['touched_ids']
+        overlay_rows = class_overlay['rows']
+        untouched_mask = ~classes_df[class_id_col_classes].isin(touched_ids)
+    
+    def available_mask(df, student_year):
+        if classtype_col and status_col:
+            return (
+                (df[year_col_classes] == student_year) &
+                (df[classtype_col].notna()) &
+                (df[classtype_col].astype(str).str.lower() == 'group') &
+                (df[status_col].notna()) &
+                (df[status_col].astype(str).str.lower() == 'active')
+            )
+        return df[year_col_classes] == student_year
+    
     # Get missed class info if provided
     missed_class_info = None
     if missed_class_id:
@@ -170,7 +202,10 @@ def find_credit_classes(classes_df, students_df, search_term, missed_class_id, p
             if pd.isna(class_id):
                 continue
             
-            class_info = classes_df[classes_df[class_id_col_classes] == class_id]
+            if class_id in touched_ids:
+                class_info = overlay_rows[overlay_rows[class_id_col_classes] == class_id]
+            else:
+                class_info = classes_df[classes_df[class_id_col_classes] == class_id]
             if not class_info.empty:
                 subject = class_info.iloc[0][subject_col]
                 stream = class_info.iloc[0][stream_col]
@@ -194,16 +229,15 @@ def find_credit_classes(classes_df, students_df, search_term, missed_class_id, p
         all_student_subjects = set(subject_stream_ability_map.keys())
         
         # Get available classes
-        if classtype_col and status_col:
-            available_classes = classes_df[
-                (classes_df[year_col_classes] == student_year) &
-                (classes_df[classtype_col].notna()) &
-                (classes_df[classtype_col].astype(str).str.lower() == 'group') &
-                (classes_df[status_col].notna()) &
-                (classes_df[status_col].astype(str).str.lower() == 'active')
-            ].copy()
+        if class_overlay is None:
+            available_classes = classes_df[available_mask(classes_df, student_year)].copy()
         else:
-            available_classes = classes_df[classes_df[year_col_classes] == student_year].copy()
+            available_classes = classes_df[available_mask(classes_df, student_year) & untouched_mask]
+            overlay_available = overlay_rows[available_mask(overlay_rows, student_year)]
+            if not overlay_available.empty:
+                available_classes = pd.concat([available_classes, overlay_available], ignore_index=True)
+            else:
+                available_classes = available_classes.copy()
         
         # Find credit classes with PRIORITY SYSTEM
         credit_classes_final = []
@@ -423,10 +457,200 @@ def find_credit_classes(classes_df, students_df, search_term, missed_class_id, p
     return results, message_student_name, message_subject, message_credit_classes, missed_class_display
 
 
-def format_results_for_export(results):
+def resolve_scenario_class(classes_df, overlays, class_id):
+    """Rows for one ClassID after applying the scenario's overlays for that class"""
+    class_id_col_classes = next((col for col in classes_df.columns if 'class' in col.lower() and 'id' in col.lower()), None)
+
+    rows = classes_df.loc[classes_df[class_id_col_classes] == class_id]
+    for overlay in overlays:
+        if overlay['class_id'] != class_id:
+            continue
+
+        if overlay['action'] == 'remove':
+            rows = rows.iloc[0:0]
+        elif overlay['action'] == 'modify':
+            rows = rows.copy()
+            for col, val in overlay['values'].items():
+                rows[col] = val
+        elif overlay['action'] == 'add':
+            new_row = pd.DataFrame([overlay['values']])
+            new_row[class_id_col_classes] = overlay['class_id']
+            rows = pd.concat([rows, new_row], ignore_index=True)
+
+    return rows
+
+
+def apply_scenario_overlays(classes_df, students_df, overlays):
+    """Apply add/remove/modify class overlays on top of the classes table and the given enrollments.
+
+    The classes table is neither modified nor copied. Only the touched classes are
+    resolved into overlay rows; find_credit_classes reads everything else from the base.
+    Returns the class overlay for find_credit_classes and the adjusted enrollments.
+    """
+    class_id_col_classes = next((col for col in classes_df.columns if 'class' in col.lower() and 'id' in col.lower()), None)
+    time_col_classes = next((col for col in classes_df.columns if 'time' in col.lower()), None)
+    class_id_col = next((col for col in students_df.columns if 'class' in col.lower() and 'id' in col.lower()), None)
+    time_col = next((col for col in students_df.columns if 'time' in col.lower()), None)
+
+    touched_ids = list(dict.fromkeys(overlay['class_id'] for overlay in overlays))
+    enrollment_updates = {}
+
+    for overlay in overlays:
+        class_id = overlay['class_id']
+        if overlay['action'] == 'remove':
+            enrollment_updates[class_id] = None
+        elif overlay['action'] == 'modify':
+            if time_col_classes and time_col_classes in overlay['values'] and enrollment_updates.get(class_id, {}) is not None:
+                enrollment_updates[class_id] = {'time': overlay['values'][time_col_classes]}
+
+    # Scenario rows of the touched classes only
+    touched_rows = [resolve_scenario_class(classes_df, overlays, class_id) for class_id in touched_ids]
+    touched_rows = [rows for rows in touched_rows if not rows.empty]
+    class_overlay = {
+        'touched_ids': set(touched_ids),
+        'rows': pd.concat(touched_rows, ignore_index=True) if touched_rows else classes_df.iloc[0:0]
+    }
+
+    # Cancelled classes free up the enrolled students; moved classes move their busy time
+    scenario_students = students_df.copy()
+    if class_id_col and enrollment_updates:
+        for class_id, update in enrollment_updates.items():
+            mask = scenario_students[class_id_col] == class_id
+            if update is None:
+                scenario_students.loc[mask, class_id_col] = None
+                if time_col:
+                    scenario_students.loc[mask, time_col] = None
+            elif time_col:
+                scenario_students.loc[mask, time_col] = update['time']
+
+    return class_overlay, scenario_students
+
+
+def find_affected_students(classes_df, students_df, overlays):
+    """Return IDs of students whose credit options can change under the overlays"""
+    student_id_col = next((col for col in students_df.columns if 'student' in col.lower() and 'id' in col.lower()), None)
+    class_id_col = next((col for col in students_df.columns if 'class' in col.lower() and 'id' in col.lower()), None)
+    year_col = next((col for col in students_df.columns if 'year' in col.lower()), None)
+    class_id_col_classes = next((col for col in classes_df.columns if 'class' in col.lower() and 'id' in col.lower()), None)
+    year_col_classes = next((col for col in classes_df.columns if 'year' in col.lower()), None)
+
+    touched_ids = list(dict.fromkeys(overlay['class_id'] for overlay in overlays))
+    touched_rows = classes_df.loc[classes_df[class_id_col_classes].isin(touched_ids)]
+
+    # Any year a touched class belongs to before or after the change
+    years = set(touched_rows[year_col_classes].dropna())
+    for overlay in overlays:
+        year_val = overlay.get('values', {}).get(year_col_classes)
+        if year_val is not None and pd.notna(year_val):
+            years.add(year_val)
+
+    affected = students_df[year_col].isin(years)
+    if class_id_col:
+        affected |= students_df[class_id_col].isin(touched_ids)
+
+    return students_df.loc[affected, student_id_col].unique()
+
+
+def summarize_credit_options(results):
+    """Collapse find_credit_classes results into {student_id: {'year', 'options'}}"""
+    summary = {}
+    current_id = None
+
+    for section in results:
+        if section['type'] == 'student_info':
+            current_id = section['id']
+            summary[current_id] = {'year': section['year'], 'options': set()}
+        elif section['type'] == 'credit_classes' and current_id is not None:
+            summary[current_id]['options'].update((cls['class_id'], cls['subject']) for cls in section['classes'])
+
+    return summary
+
+
+def run_scenario(classes_df, students_df, overlays, baseline_cache=None):
+    """Evaluate a what-if scenario and report credit option deltas per year/subject.
+
+    Only students affected by the overlays are recomputed. Baseline options are
+    kept in baseline_cache (keyed by StudentID) so they are shared across scenarios.
+    """
+    student_id_col = next((col for col in students_df.columns if 'student' in col.lower() and 'id' in col.lower()), None)
+    delta_columns = ['Year', 'Subject', 'Students Gaining', 'Students Losing', 'Options Gained', 'Options Lost', 'Net Change']
+
+    if baseline_cache is None:
+        baseline_cache = {}
+
+    affected_ids = find_affected_students(classes_df, students_df, overlays)
+    summary = {'affected_students': len(affected_ids), 'students_gaining': 0, 'students_losing': 0}
+    if len(affected_ids) == 0:
+        return pd.DataFrame(columns=delta_columns), summary
+
+    # Baseline for affected students not seen before
+    missing_ids = [student_id for student_id in affected_ids if student_id not in baseline_cache]
+    if missing_ids:
+        baseline_students = students_df[students_df[student_id_col].isin(missing_ids)]
+        baseline_results = find_credit_classes(classes_df, baseline_students, None, None, True)[0]
+        baseline_cache.update(summarize_credit_options(baseline_results))
+
+    # Scenario for affected students only
+    affected_students = students_df[students_df[student_id_col].isin(affected_ids)]
+    class_overlay, scenario_students = apply_scenario_overlays(classes_df, affected_students, overlays)
+    scenario_results = find_credit_classes(classes_df, scenario_students, None, None, True, class_overlay)[0]
+    scenario_options = summarize_credit_options(scenario_results)
+
+    deltas = {}
+    for student_id in affected_ids:
+        baseline = baseline_cache.get(student_id, {'year': "Unknown", 'options': set()})
+        scenario = scenario_options.get(student_id, {'year': baseline['year'], 'options': set()})
+        gained = scenario['options'] - baseline['options']
+        lost = baseline['options'] - scenario['options']
+
+        if gained:
+            summary['students_gaining'] += 1
+        if lost:
+            summary['students_losing'] += 1
+
+        for option_set, options_key, students_key in ((gained, 'Options Gained', 'Students Gaining'), (lost, 'Options Lost', 'Students Losing')):
+            subjects = {}
+            for _, subject in option_set:
+                subjects[subject] = subjects.get(subject, 0) + 1
+            for subject, count in subjects.items():
+                key = (baseline['year'], subject)
+                if key not in deltas:
+                    deltas[key] = {'Students Gaining': 0, 'Students Losing': 0, 'Options Gained': 0, 'Options Lost': 0}
+                deltas[key][students_key] += 1
+                deltas[key][options_key] += count
+
+    rows = []
+    for (year, subject), counts in deltas.items():
+        rows.append({
+            'Year': year,
+            'Subject': subject,
+            **counts,
+            'Net Change': counts['Options Gained'] - counts['Options Lost']
+        })
+
+    delta_df = pd.DataFrame(rows, columns=delta_columns)
+    if not delta_df.empty:
+        delta_df = delta_df.sort_values(['Year', 'Subject'], key=lambda col: col.astype(str)).reset_index(drop=True)
+
+    return delta_df, summary
+
+
+def describe_overlay(overlay):
+    """Short human-readable description of a scenario change"""
+    if overlay['action'] == 'remove':
+        return f"Remove class {overlay['class_id']}"
+    if overlay['action'] == 'add':
+        return f"Add class {overlay['class_id']} (copy of {overlay['template_id']})"
+    changes = ", ".join(f"{col} = {val}" for col, val in overlay['values'].items())
+    return f"Modify class {overlay['class_id']}: {changes}"
+
+
+def format_results_for_export(results, include_header=True):
     """Format results as plain text for export"""
-    text = "CREDIT CLASS FINDER - RESULTS\n"
-    text += "=" * 80 + "\n\n"
+    text = ""
+    if include_header:
+        text += "CREDIT CLASS FINDER - RESULTS\n"
+        text += "=" * 80 + "\n\n"
     
     for section in results:
         if section['type'] == 'student_info':
@@ -449,6 +673,211 @@ def format_results_for_export(results):
     return text
 
 
+# Chunked processing settings
+# Memory model for Large File Mode. The costs were measured offline with tracemalloc on
+# generated enrollment files (openpyxl 3.1, pandas 2.2 and 3.0) and rounded up.
+CHUNK_ROW_BYTES = 3000  # one enrollment row: spilled tuple, DataFrame cells and per-student lookups
+CHUNK_OPTION_BYTES = 1500  # one credit option kept for the chunk: result and message dicts, export text
+CHUNK_CANDIDATE_BYTES = 3000  # one candidate class row held while a single student is processed
+CHUNK_FIXED_BYTES = 8 * 1024 * 1024  # workbook reader, spill database cache and sorter, gzip writer
+SPILL_BATCH_ROWS = 1000  # enrollment rows written to the spill database at a time
+SHEET_DATA_TAG = f"{{{SHEET_MAIN_NS}}}sheetData"
+ROW_TAG = f"{{{SHEET_MAIN_NS}}}row"
+
+
+def iter_sheet_values(workbook):
+    """Yield the values of each row of the first worksheet (the sheet pd.read_excel reads).
+
+    openpyxl's read-only iterator keeps an emptied XML element for every row it has
+    parsed, so its memory grows with the file. This drives openpyxl's row parser
+    directly and detaches each row element as soon as it has been read.
+    """
+    sheet = workbook.worksheets[0]
+    with sheet._get_source() as source:
+        parser = WorkSheetParser(
+            source,
+            workbook.shared_strings,
+            data_only=True,
+            epoch=workbook.epoch,
+            date_formats=workbook._date_formats,
+            timedelta_formats=workbook._timedelta_formats
+        )
+        sheet_data = None
+        
+        for event, element in iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if element.tag == SHEET_DATA_TAG:
+                    sheet_data = element
+                continue
+            if element.tag != ROW_TAG:
+                continue
+            
+            _, cells = parser.parse_row(element)
+            parser.row_dimensions.clear()
+            if sheet_data is not None:
+                sheet_data.remove(element)
+            
+            if cells:
+                values = [None] * max(cell['column'] for cell in cells)
+                for cell in cells:
+                    values[cell['column'] - 1] = cell['value']
+                yield tuple(values)
+
+
+def spill_key(val):
+    """Campus or StudentID value as something sqlite can store and sort"""
+    if val is None or isinstance(val, (int, float, str)):
+        return val
+    return str(val)
+
+
+def spill_students_file(students_file, database, available_bytes):
+    """Pass 1: copy the enrollments into an on-disk sqlite table keyed by campus and StudentID.
+
+    The students file can be in any order. Returns the header of the students sheet,
+    or None if the sheet is empty.
+    """
+    workbook = openpyxl.load_workbook(students_file, read_only=True, data_only=True)
+    try:
+        # The shared strings table is loaded whole and held until the workbook is closed
+        shared_strings_bytes = sum(sys.getsizeof(text) for text in workbook.shared_strings)
+        if shared_strings_bytes + CHUNK_FIXED_BYTES > available_bytes:
+            raise ValueError("Memory budget is too small to read the students file; please increase it")
+        
+        rows = iter_sheet_values(workbook)
+        header_row = next(rows, None)
+        if header_row is None:
+            return None
+        header = [str(val) if val is not None else f"Unnamed: {i}" for i, val in enumerate(header_row)]
+        width = len(header)
+        
+        student_id_idx = next((i for i, col in enumerate(header) if 'student' in col.lower() and 'id' in col.lower()), None)
+        campus_idx = next((i for i, col in enumerate(header) if 'campus' in col.lower()), None)
+        if student_id_idx is None:
+            raise ValueError("Students file has no StudentID column")
+        
+        database.execute("CREATE TABLE enrollments (campus, student_id, seq INTEGER, data BLOB)")
+        batch = []
+        
+        for seq, row in enumerate(rows):
+            if all(val is None for val in row):
+                continue
+            if len(row) != width:
+                row = (row + (None,) * width)[:width]
+            
+            campus = row[campus_idx] if campus_idx is not None else None
+            batch.append((spill_key(campus), spill_key(row[student_id_idx]), seq, pickle.dumps(row)))
+            if len(batch) >= SPILL_BATCH_ROWS:
+                database.executemany("INSERT INTO enrollments VALUES (?, ?, ?, ?)", batch)
+                batch = []
+        
+        if batch:
+            database.executemany("INSERT INTO enrollments VALUES (?, ?, ?, ?)", batch)
+        database.execute("CREATE INDEX enrollments_by_student ON enrollments (campus, student_id, seq)")
+        database.commit()
+        return header
+    finally:
+        workbook.close()
+
+
+def iter_student_chunks(database, header, chunk_rows):
+    """Pass 2: read the spilled enrollments back as DataFrames that never split a student.
+
+    Students come back ordered by campus and StudentID, and chunks also break whenever
+    the campus changes.
+    """
+    cursor = database.execute("SELECT campus, student_id, data FROM enrollments ORDER BY campus, student_id, seq")
+    try:
+        buffer = []
+        current_key = None
+        
+        for campus, student_id, data in cursor:
+            key = (campus, student_id)
+            if key != current_key:
+                # Only flush on a student boundary so each student stays in one chunk
+                campus_changed = current_key is not None and campus != current_key[0]
+                if buffer and (len(buffer) >= chunk_rows or campus_changed):
+                    yield pd.DataFrame(buffer, columns=header)
+                    buffer = []
+                current_key = key
+            
+            buffer.append(pickle.loads(data))
+        
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        cursor.close()
+
+
+def estimate_chunk_rows(classes_df, available_bytes):
+    """Enrollment rows per chunk that keep processing within available_bytes, or 0 if none fit"""
+    year_col_classes = next((col for col in classes_df.columns if 'year' in col.lower()), None)
+    
+    year_counts = classes_df[year_col_classes].value_counts() if year_col_classes else pd.Series(dtype=int)
+    classes_per_year = int(year_counts.max()) if not year_counts.empty else len(classes_df)
+    
+    # find_credit_classes copies one year of classes and holds its candidates while a student is processed
+    student_bytes = classes_df.memory_usage(deep=True).sum() + classes_per_year * CHUNK_CANDIDATE_BYTES
+    # A student has at least one row and gets at most one option per class in their year
+    row_bytes = CHUNK_ROW_BYTES + classes_per_year * CHUNK_OPTION_BYTES
+    
+    chunk_bytes = available_bytes - CHUNK_FIXED_BYTES - student_bytes
+    return max(int(chunk_bytes // row_bytes), 0)
+
+
+def process_students_in_chunks(classes_df, students_file, missed_class_id, memory_budget_mb, output, on_chunk=None):
+    """Process all students chunk by chunk, streaming export text to output.
+
+    The memory budget covers the uploaded students file, the classes table, the
+    workbook's shared strings while the file is spilled, and one chunk of enrollments
+    with its results. Chunks are sized from the fixed costs of the memory model above,
+    so a budget that is too small fails before any processing starts. The students
+    file is spilled to a temporary sqlite database first, so it need not be sorted.
+    """
+    students_file.seek(0, os.SEEK_END)
+    upload_bytes = students_file.tell()
+    students_file.seek(0)
+    
+    available_bytes = memory_budget_mb * 1024 * 1024 - upload_bytes - classes_df.memory_usage(deep=True).sum()
+    chunk_rows = estimate_chunk_rows(classes_df, available_bytes)
+    if chunk_rows < 1:
+        raise ValueError(f"Memory budget of {memory_budget_mb} MB is too small for these files; please increase it")
+    
+    summary = {'chunks': 0, 'students': 0, 'students_without_credits': 0}
+    output.write(format_results_for_export([]))
+    
+    with tempfile.TemporaryDirectory(prefix="credit_finder_spill_") as spill_dir:
+        database = sqlite3.connect(os.path.join(spill_dir, "enrollments.sqlite"))
+        try:
+            # Keep sqlite's page cache and sorter small; both spill to disk beyond this
+            database.execute("PRAGMA cache_size = -2000")
+            database.execute("PRAGMA temp_store = FILE")
+            
+            header = spill_students_file(students_file, database, available_bytes)
+            if header is None:
+                return summary
+            
+            for chunk in iter_student_chunks(database, header, chunk_rows):
+                results = find_credit_classes(classes_df, chunk, None, missed_class_id, True)[0]
+                output.write(format_results_for_export(results, include_header=False))
+                
+                summary['chunks'] += 1
+                for section in results:
+                    if section['type'] == 'student_info':
+                        summary['students'] += 1
+                    elif section['type'] == 'credit_classes' and not section['classes']:
+                        summary['students_without_credits'] += 1
+                
+                del chunk, results
+                
+                if on_chunk:
+                    on_chunk(summary)
+        finally:
+            database.close()
+    
+    return summary
+
+
 def generate_message_template(data):
     """Generate message template"""
     student_name = data['student_name']
@@ -486,6 +915,21 @@ if 'message_data' not in st.session_state:
     st.session_state.message_data = None
 if 'missed_class_display' not in st.session_state:
     st.session_state.missed_class_display = None
+if 'scenarios' not in st.session_state:
+    st.session_state.scenarios = {}
+if 'scenario_results' not in st.session_state:
+    st.session_state.scenario_results = {}
+if 'scenario_baseline' not in st.session_state:
+    st.session_state.scenario_baseline = {}
+if 'chunked_mode' not in st.session_state:
+    st.session_state.chunked_mode = False
+if 'chunked_export_dir' not in st.session_state:
+    # Removed together with its contents when the session ends
+    st.session_state.chunked_export_dir = tempfile.TemporaryDirectory(prefix="credit_finder_")
+if 'chunked_summary' not in st.session_state:
+    st.session_state.chunked_summary = None
+
+chunked_export_path = os.path.join(st.session_state.chunked_export_dir.name, "credit_classes.txt.gz")
 
 # Sidebar for file uploads
 with st.sidebar:
@@ -503,14 +947,42 @@ with st.sidebar:
         help="Excel file containing student enrollments"
     )
     
+    large_file_mode = st.checkbox(
+        "📦 Large File Mode",
+        help="Process the students file in chunks instead of loading it all at once. The file must be .xlsx; it is split by campus and StudentID on disk, so it does not need to be sorted."
+    )
+    memory_budget_mb = st.number_input(
+        "Memory Budget (MB)",
+        min_value=64,
+        value=512,
+        step=64,
+        disabled=not large_file_mode,
+        help="Covers the uploaded students file, the classes table, one chunk of students with its results, and the compressed export when it is downloaded"
+    )
+    
     if classes_file and students_file:
         if st.button("⚡ Load Files", type="primary", use_container_width=True):
             with st.spinner("Loading files..."):
                 try:
                     st.session_state.classes_df = pd.read_excel(classes_file)
-                    st.session_state.students_df = pd.read_excel(students_file)
-                    st.success("✅ Files loaded successfully!")
-                    st.info(f"📊 {len(st.session_state.classes_df)} classes | {len(st.session_state.students_df)} enrollments")
+                    st.session_state.scenario_results = {}
+                    st.session_state.scenario_baseline = {}
+                    st.session_state.chunked_summary = None
+                    if os.path.exists(chunked_export_path):
+                        os.remove(chunked_export_path)
+                    
+                    if large_file_mode:
+                        if not students_file.name.lower().endswith('.xlsx'):
+                            raise ValueError("Large File Mode requires an .xlsx students file")
+                        st.session_state.students_df = None
+                        st.session_state.chunked_mode = True
+                        st.success("✅ Classes loaded! Students will be processed in chunks.")
+                        st.info(f"📊 {len(st.session_state.classes_df)} classes")
+                    else:
+                        st.session_state.students_df = pd.read_excel(students_file)
+                        st.session_state.chunked_mode = False
+                        st.success("✅ Files loaded successfully!")
+                        st.info(f"📊 {len(st.session_state.classes_df)} classes | {len(st.session_state.students_df)} enrollments")
                 except Exception as e:
                     st.error(f"Error loading files: {str(e)}")
     
@@ -519,7 +991,68 @@ with st.sidebar:
     st.info("This tool helps find suitable credit classes for students based on their schedule and subjects.")
 
 # Main content
-if st.session_state.classes_df is not None and st.session_state.students_df is not None:
+if st.session_state.chunked_mode and st.session_state.classes_df is not None and students_file:
+    
+    st.info("📦 Large File Mode: all students are processed in chunks and results are written straight to a compressed export file. Search and What-if Scenarios need the students file fully loaded.")
+    
+    chunked_missed_class_id = st.text_input(
+        "🎯 Missed Class ID (Optional)",
+        placeholder="Leave blank for general credits, or enter ClassID for replacements",
+        help="Enter a specific ClassID to find replacement classes",
+        key="chunked_missed_class_id"
+    )
+    
+    if st.button("🔎 Process All Students", type="primary", use_container_width=True):
+        progress_text = st.empty()
+        
+        def show_progress(summary):
+            progress_text.text(f"Processed {summary['students']} students in {summary['chunks']} chunk(s)...")
+        
+        try:
+            students_file.seek(0)
+            # Overwrites the export from the previous run
+            with gzip.open(chunked_export_path, 'wt', encoding='utf-8') as export_file:
+                st.session_state.chunked_summary = process_students_in_chunks(
+                    st.session_state.classes_df,
+                    students_file,
+                    chunked_missed_class_id if chunked_missed_class_id else None,
+                    memory_budget_mb,
+                    export_file,
+                    on_chunk=show_progress
+                )
+            progress_text.empty()
+            
+            # The download is read into memory, so it has to fit in the budget too
+            if os.path.getsize(chunked_export_path) > memory_budget_mb * 1024 * 1024:
+                raise ValueError(f"Compressed export is larger than the {memory_budget_mb} MB memory budget; please increase it")
+        except Exception as e:
+            st.session_state.chunked_summary = None
+            if os.path.exists(chunked_export_path):
+                os.remove(chunked_export_path)
+            st.error(f"Error: {str(e)}")
+    
+    if st.session_state.chunked_summary and os.path.exists(chunked_export_path):
+        summary = st.session_state.chunked_summary
+        st.markdown("---")
+        st.markdown("### 📊 Results")
+        st.success(f"✅ Processed {summary['students']} students in {summary['chunks']} chunk(s)")
+        if summary['students_without_credits']:
+            st.warning(f"⚠️ {summary['students_without_credits']} student(s) have no classes available to be credits")
+        
+        # Read the export only when the button is clicked, not on every rerun
+        def read_chunked_export():
+            with open(chunked_export_path, 'rb') as export_file:
+                return export_file.read()
+        
+        st.download_button(
+            label="💾 Export Results",
+            data=read_chunked_export,
+            file_name=f"credit_classes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt.gz",
+            mime="application/gzip",
+            use_container_width=True
+        )
+
+elif st.session_state.classes_df is not None and st.session_state.students_df is not None:
     
     # Search section
     col1, col2 = st.columns([3, 1])
@@ -646,6 +1179,144 @@ if st.session_state.classes_df is not None and st.session_state.students_df is n
                     st.text_area("📧 Message Template (Copy this)", message, height=200, key="message_display")
             else:
                 st.button("📋 Copy Message Template", use_container_width=True, disabled=True, help="Enter a Missed Class ID to enable message template")
+    
+    # What-if scenarios
+    st.markdown("---")
+    with st.expander("🧪 What-if Scenarios"):
+        st.caption("Try timetable changes in memory and see how many students gain or lose credit options. The uploaded files are not changed.")
+        
+        classes_df = st.session_state.classes_df
+        class_id_col_classes = next((col for col in classes_df.columns if 'class' in col.lower() and 'id' in col.lower()), None)
+        
+        scenario_name = st.text_input("Scenario Name", value="Scenario 1", key="scenario_name")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            scenario_action = st.selectbox(
+                "Change",
+                ["Remove class", "Modify class", "Add class (copy of existing)"],
+                key="scenario_action"
+            )
+        with col2:
+            scenario_class_id = st.text_input(
+                "ClassID",
+                placeholder="ClassID to remove, modify or copy",
+                key="scenario_class_id"
+            )
+        
+        # Look up classes in the base table and among the classes added by this scenario
+        scenario_overlays = st.session_state.scenarios.get(scenario_name, [])
+        added_ids = {str(overlay['class_id']): overlay['class_id'] for overlay in scenario_overlays if overlay['action'] == 'add'}
+        base_match = classes_df.loc[classes_df[class_id_col_classes].astype(str) == scenario_class_id, class_id_col_classes] if scenario_class_id else []
+        
+        if len(base_match):
+            base_row = resolve_scenario_class(classes_df, scenario_overlays, base_match.iloc[0])
+        elif scenario_class_id in added_ids:
+            base_row = resolve_scenario_class(classes_df, scenario_overlays, added_ids[scenario_class_id])
+        else:
+            base_row = classes_df.head(0)
+        
+        if scenario_class_id and base_row.empty:
+            st.warning(f"⚠️ ClassID '{scenario_class_id}' not found in this scenario")
+        elif not base_row.empty:
+            base_row = base_row.head(1)
+            edited_row = base_row
+            new_class_id = None
+            
+            if scenario_action != "Remove class":
+                if scenario_action.startswith("Add"):
+                    new_class_id = st.text_input("New ClassID", key="scenario_new_class_id")
+                edited_row = st.data_editor(
+                    base_row,
+                    hide_index=True,
+                    disabled=[class_id_col_classes],
+                    key=f"scenario_editor_{scenario_action}_{scenario_class_id}"
+                )
+            
+            if st.button("➕ Add Change to Scenario", use_container_width=True):
+                base_id = base_row.iloc[0][class_id_col_classes]
+                overlay = None
+                
+                if scenario_action == "Remove class":
+                    overlay = {'action': 'remove', 'class_id': base_id, 'values': {}}
+                elif scenario_action == "Modify class":
+                    changed = {}
+                    for col in base_row.columns:
+                        old_val = base_row.iloc[0][col]
+                        new_val = edited_row.iloc[0][col]
+                        if col == class_id_col_classes or (pd.isna(old_val) and pd.isna(new_val)) or old_val == new_val:
+                            continue
+                        changed[col] = new_val
+                    if changed:
+                        overlay = {'action': 'modify', 'class_id': base_id, 'values': changed}
+                    else:
+                        st.warning(f"⚠️ No changes made to ClassID '{scenario_class_id}'")
+                elif not new_class_id:
+                    st.warning("⚠️ Please enter a New ClassID for the added class")
+                elif new_class_id in added_ids or (classes_df[class_id_col_classes].astype(str) == new_class_id).any():
+                    st.warning(f"⚠️ ClassID '{new_class_id}' already exists")
+                else:
+                    if pd.api.types.is_integer(base_id) and new_class_id.isdigit():
+                        new_class_id = int(new_class_id)
+                    overlay = {
+                        'action': 'add',
+                        'class_id': new_class_id,
+                        'template_id': base_id,
+                        'values': edited_row.iloc[0].to_dict()
+                    }
+                
+                if overlay is not None:
+                    st.session_state.scenarios.setdefault(scenario_name, []).append(overlay)
+                    st.session_state.scenario_results.pop(scenario_name, None)
+        
+        scenario_overlays = st.session_state.scenarios.get(scenario_name, [])
+        if scenario_overlays:
+            st.markdown(f"**Changes in {scenario_name}:**")
+            for i, overlay in enumerate(scenario_overlays, 1):
+                st.markdown(f"{i}. {describe_overlay(overlay)}")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("▶️ Run Scenario", type="primary", use_container_width=True):
+                    with st.spinner("Evaluating scenario..."):
+                        try:
+                            st.session_state.scenario_results[scenario_name] = run_scenario(
+                                classes_df,
+                                st.session_state.students_df,
+                                scenario_overlays,
+                                st.session_state.scenario_baseline
+                            )
+                        except Exception as e:
+                            st.error(f"Error: {str(e)}")
+            with col2:
+                if st.button("🗑️ Clear Scenario", use_container_width=True):
+                    st.session_state.scenarios.pop(scenario_name, None)
+                    st.session_state.scenario_results.pop(scenario_name, None)
+                    st.rerun()
+        
+        if scenario_name in st.session_state.scenario_results:
+            delta_df, summary = st.session_state.scenario_results[scenario_name]
+            st.info(f"📊 {summary['affected_students']} students affected | {summary['students_gaining']} gain options | {summary['students_losing']} lose options")
+            if delta_df.empty:
+                st.success("✅ No change in credit options")
+            else:
+                st.dataframe(delta_df, hide_index=True, use_container_width=True)
+        
+        # Compare all evaluated scenarios side by side
+        if len(st.session_state.scenario_results) > 1:
+            st.markdown("**Scenario Comparison:**")
+            comparison = pd.DataFrame([
+                {
+                    'Scenario': name,
+                    'Changes': len(st.session_state.scenarios.get(name, [])),
+                    'Students Affected': summary['affected_students'],
+                    'Students Gaining': summary['students_gaining'],
+                    'Students Losing': summary['students_losing'],
+                    'Net Change': int(delta_df['Net Change'].sum()) if not delta_df.empty else 0
+                }
+                for name, (delta_df, summary) in st.session_state.scenario_results.items()
+            ])
+            st.dataframe(comparison, hide_index=True, use_container_width=True)
 
 else:
     # Welcome screen
@@ -659,6 +1330,8 @@ else:
         4. **Optional**: Enter a Missed Class ID to find replacements
         5. **Find Classes**: Click "Find Credit Classes"
         6. **Export**: Download results or copy message template
+        7. **What-if**: Use "What-if Scenarios" to test timetable changes before making them
+        8. **Large Files**: Tick "Large File Mode" to process very large students files in chunks
         """)
     
     with st.expander("ℹ️ Rules Applied"):